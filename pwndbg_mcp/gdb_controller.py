@@ -1,20 +1,41 @@
 from dataclasses import dataclass
 from pygdbmi.gdbcontroller import GdbController
+from pygdbmi.constants import DEFAULT_TIME_TO_CHECK_FOR_ADDITIONAL_OUTPUT_SEC
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+from collections import deque
 import logging
+import queue
+import threading
+from typing import Any, Callable
+import fcntl
 import os
-import select
 import pty
-import tty
+import struct
 import termios
-from hexdump import hexdump
 from enum import StrEnum
-import re
+try: # DFA based engine, no backtracking on long console output
+    import re2 as re
+except ImportError:
+    import re
 ANSI_COLOR_RE = re.compile(r'\x1b\[[0-9;]*m')
 
 logger = logging.getLogger(__name__)
 
+PTY_READ_SIZE = 0x10000
+# stop draining PTY when this much output is unread, so the process blocks
+# on write just like on a real terminal
+PTY_BUFFER_LIMIT = 0x100000
+# seconds between checks whether a ctrl char can be sent, and for the line
+# discipline to act on it before switching PTY back to raw mode
+PTY_CTRL_WAIT = 0.01
+
+def strip_color(msg: str) -> str:
+    """Remove ANSI color sequences from msg. Most lines have no color at all,
+    so skip the regex if there is no escape char."""
+    if '\x1b' not in msg:
+        return msg
+    return ANSI_COLOR_RE.sub('', msg)
+
 class GdbState(StrEnum):
     DEAD    = 'Uninitialized'
     STOPPED = 'Stopped'
@@ -27,17 +48,26 @@ class GdbMIType(StrEnum):
     RESULT  = 'result'
     TARGET  = 'target'
 
-@dataclass
+# plain dict lookup is much cheaper than GdbMIType(...) for every record
+_MITYPE_MAP: dict[str, GdbMIType] = {t.value: t for t in GdbMIType}
+# notify messages which change gdb state
+_NOTIFY_STATE: dict[str, GdbState] = {
+    'running': GdbState.RUNNING,
+    'stopped': GdbState.STOPPED,
+}
+
+@dataclass(slots=True)
 class GdbResponse:
     """Parsed GDB/MI response."""
     mitype: GdbMIType
     message: str | dict | None
 
     def __init__(self, mitype: str, message: str | None, payload: dict | str | None) -> None:
-        self.mitype = GdbMIType(mitype)
+        self.mitype = _MITYPE_MAP[mitype]
+        if self.mitype is GdbMIType.RESULT and message == 'error' and isinstance(payload, dict):
+            # ^error,msg="...", payload is dropped below, so keep the reason here
+            message = f"error: {payload.get('msg', payload)}"
         self.message = message if message else payload
-        if isinstance(self.message, str): # strip color
-            self.message = ANSI_COLOR_RE.sub('', self.message)
 
 
 def update_gdb_state(resps: list[GdbResponse]) -> GdbState | None:
@@ -49,104 +79,323 @@ def update_gdb_state(resps: list[GdbResponse]) -> GdbState | None:
     cache = None
     for resp in resps:
         if resp.mitype is GdbMIType.NOTIFY:
-            match resp.message:
-                case 'running': cache = GdbState.RUNNING
-                case 'stopped': cache = GdbState.STOPPED
+            cache = _NOTIFY_STATE.get(resp.message, cache)
     return cache
 
-def process_responses(resps: list[GdbResponse]) -> bool:
-        """Remove useless entry in responses and join some lines
+def process_responses(resps: list[GdbResponse]) -> tuple[bool, GdbState | None]:
+        """Remove useless entry in responses, join some lines and parse
+        gdb state changes in one pass
+
+        Result records are dropped except errors.
 
         Returns:
-            If seen 'result: done' in response
+            If seen 'result: done' in response, and GdbState if found state
+            (the last state) or None if not found
         """
-        cache = ''
-        pop_list = []
+        cache: list[str] = [] # unterminated console fragments
+        tail: GdbResponse | None = None # last unterminated console fragment
+        tail_pos = 0
+        kept = []
         done = False
-        for i, r in enumerate(resps):
-            match r.mitype:
-                case GdbMIType.CONSOLE:
-                    if not r.message.endswith('\n'):
-                        cache += r.message
-                        pop_list.append(i)
-                    else:
-                        if cache:
-                            r.message = cache + r.message
-                            cache = ''
-                        r.message = r.message.strip()
-                case GdbMIType.LOG:
-                    r.message = r.message.strip()
-                case GdbMIType.NOTIFY:
-                    if r.message == 'cmd-param-changed':
-                        pop_list.append(i)
-                case GdbMIType.RESULT:
-                    if r.message == 'done':
-                        done = True
-                    pop_list.append(i)
+        state = None
+        for r in resps:
+            # identity checks, `match` value patterns compare with str.__eq__
+            mitype = r.mitype
+            if mitype is GdbMIType.CONSOLE:
+                if not r.message.endswith('\n'):
+                    cache.append(r.message)
+                    tail, tail_pos = r, len(kept)
+                    continue
+                if cache:
+                    cache.append(r.message)
+                    r.message = ''.join(cache)
+                    cache.clear()
+                # strip color once on the joined line
+                r.message = strip_color(r.message).strip()
+            elif mitype is GdbMIType.LOG:
+                r.message = strip_color(r.message).strip()
+            elif mitype is GdbMIType.NOTIFY:
+                if r.message == 'cmd-param-changed':
+                    continue
+                state = _NOTIFY_STATE.get(r.message, state)
+            elif mitype is GdbMIType.RESULT:
+                if r.message == 'done':
+                    done = True
+                # only errors are worth reporting, e.g. a failing pipelined command
+                if not r.message.startswith('error'):
+                    continue
+            elif mitype is GdbMIType.TARGET:
+                r.message = strip_color(r.message)
+            kept.append(r)
         if cache:
-            resps[pop_list[-1]].message = cache.strip()
-            pop_list.pop(-1)
-        for i in reversed(pop_list):
-            resps.pop(i)
-        return done
+            # output not terminated by newline, keep it where it was seen
+            tail.message = strip_color(''.join(cache)).strip()
+            kept.insert(tail_pos, tail)
+        resps[:] = kept
+        return done, state
+
+def _set_future(future: asyncio.Future, result: Any, exc: BaseException | None) -> None:
+    if future.done(): # cancelled
+        return
+    if exc is not None:
+        future.set_exception(exc)
+    else:
+        future.set_result(result)
+
+def _raw_attrs(attrs: list) -> list:
+    """Return a copy of termios attrs switched to raw mode, same as tty.setraw"""
+    raw = [*attrs[:6], list(attrs[6])]
+    raw[0] &= ~(termios.BRKINT | termios.ICRNL | termios.INPCK | termios.ISTRIP | termios.IXON)
+    raw[1] &= ~termios.OPOST
+    raw[2] &= ~(termios.CSIZE | termios.PARENB)
+    raw[2] |= termios.CS8
+    raw[3] &= ~(termios.ECHO | termios.ICANON | termios.IEXTEN | termios.ISIG)
+    raw[6][termios.VMIN] = 1
+    raw[6][termios.VTIME] = 0
+    return raw
+
+def _own_buffer(view: memoryview) -> memoryview:
+    """Return view itself if it is read only, or a view of its copy, so it
+    can be queued while caller reuses a mutable buffer"""
+    return view if view.readonly else memoryview(bytes(view))
+
+def _unread_input(fd: int) -> int:
+    """Return how many input bytes on tty fd are not read yet"""
+    return struct.unpack('i', fcntl.ioctl(fd, termios.FIONREAD, b'\0' * 4))[0]
 
 class AsyncGdbController:
     state: GdbState
 
-    def __init__(self, gdb_path: str, gdb_args: list[str] | None = None, timeout: float = 5):
+    def __init__(self, gdb_path: str, gdb_args: list[str] | None = None, timeout: float = 5,
+                 batch_window: float = DEFAULT_TIME_TO_CHECK_FOR_ADDITIONAL_OUTPUT_SEC):
         self.gdb_path = gdb_path
         self.gdb_args = gdb_args or ["-q", "--interpreter=mi3"]
         self.timeout = timeout
+        # once gdb outputs something, keep reading until it is quiet for this
+        # many seconds, so bursts of MI records come back in one batch
+        self.batch_window = batch_window
         self._controller: GdbController | None = None
-        self._executor = ThreadPoolExecutor(max_workers=1)
+        # all gdb I/O is serialized through one long-lived worker thread
+        self._jobs: queue.SimpleQueue = queue.SimpleQueue()
+        self._worker: threading.Thread | None = None
+        self._started = False
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._restarting: asyncio.Task | None = None
         self.state = GdbState.DEAD
 
         # PTY for target process I/O
         self._pty_master: int | None = None
         self._pty_slave: int | None = None
         self._pty_name: str | None = None
+        # process output drained from PTY in background
+        self._pty_buf = bytearray()
+        self._pty_readable = asyncio.Event()
+        self._pty_draining = False
+        # input the process has not taken yet, (data, is ctrl char) in FIFO
+        # order, written whenever PTY is writable so gdb is never blocked
+        self._pty_pending: deque[tuple[memoryview, bool]] = deque()
+        self._pty_writing = False
+        # set while writing waits for PTY to settle around a ctrl char
+        self._pty_timer: asyncio.TimerHandle | None = None
+
+    def _work(self) -> None:
+        """Worker thread body, run submitted jobs in order until None received"""
+        while (job := self._jobs.get()) is not None:
+            fn, future = job
+            # anything raised goes to the caller, the worker must outlive it
+            # or later submitted jobs wait forever
+            try:
+                result = fn()
+            except BaseException as e:
+                self._loop.call_soon_threadsafe(_set_future, future, None, e)
+            else:
+                self._loop.call_soon_threadsafe(_set_future, future, result, None)
+
+    async def _submit(self, fn: Callable[[], Any]) -> Any:
+        """Run fn on the worker thread and wait for its result
+
+        Raises:
+            RuntimeError: If controller is closed, nothing would run fn
+        """
+        if self._worker is None:
+            raise RuntimeError('GDB controller closed')
+        future = self._loop.create_future()
+        self._jobs.put((fn, future))
+        return await future
 
     async def start(self) -> None:
         if self.state is not GdbState.DEAD:
             return
 
+        self._loop = asyncio.get_running_loop()
+        self._worker = threading.Thread(target=self._work, name='gdb-io', daemon=True)
+        self._worker.start()
+        await self._spawn()
+
+    async def _spawn(self) -> None:
+        """Create PTY for target process and launch gdb on it"""
         # Create PTY for target process communication
+        self._pty_buf.clear()
         self._pty_master, self._pty_slave = pty.openpty()
         self._pty_name = os.ttyname(self._pty_slave)
-        logger.debug(f"Created PTY: master={self._pty_master}, slave={self._pty_name}")
+        logger.debug("Created PTY: master=%d, slave=%s", self._pty_master, self._pty_name)
 
         # save original slave attr, except ECHO, so we can restore it when sending signal
         self._pty_attrs: termios._Attr = termios.tcgetattr(self._pty_slave)
         self._pty_attrs[3] &= ~termios.ECHO
-        tty.setraw(self._pty_slave)
-        tty.setraw(self._pty_master)
+        # compute raw attr once and apply to both ends
+        self._pty_raw_attrs = _raw_attrs(self._pty_attrs)
+        termios.tcsetattr(self._pty_slave, termios.TCSAFLUSH, self._pty_raw_attrs)
+        termios.tcsetattr(self._pty_master, termios.TCSAFLUSH, self._pty_raw_attrs)
+        # writes must not block when process does not read its input
+        os.set_blocking(self._pty_master, False)
+        self._set_draining(True)
 
-        self.poller = select.poll()
-        self.poller.register(self._pty_master, select.EPOLLIN)
         # Start GDB
         command = [self.gdb_path, *self.gdb_args, '-ex', f'set inferior-tty {self._pty_name}']
-        print(command)
-        loop = asyncio.get_event_loop()
-        self._controller = await loop.run_in_executor(
-            self._executor,
-            lambda: GdbController(command=command),
-        )
+        logger.debug("Launching GDB: %s", command)
+        # not on the worker, which may still be busy with the old gdb on restart
+        self._controller = await asyncio.to_thread(lambda: GdbController(
+            command=command,
+            time_to_check_for_additional_output_sec=self.batch_window,
+        ))
         self.state = GdbState.STOPPED
         self._started = True
-        logger.info(f"GDB started with PTY: {self._pty_name}")
+        logger.info("GDB started with PTY: %s", self._pty_name)
+
+    async def restart(self) -> None:
+        """Replace gdb with a new one on a new PTY. Old gdb is shut down while
+        the new one is starting up. Calls made while a restart is in progress
+        wait for that restart instead of starting another one."""
+        if self._restarting is None or self._restarting.done():
+            self._restarting = asyncio.create_task(self._restart())
+        # caller being cancelled must not abort the restart halfway
+        await asyncio.shield(self._restarting)
+
+    async def _restart(self) -> None:
+        if not self._started: # closed, start from scratch
+            await self.start()
+            return
+        old = self._controller
+        self._close_pty()
+        self.state = GdbState.DEAD
+        logger.info("Restarting GDB")
+        # old gdb exits on the worker after jobs already submitted for it
+        await asyncio.gather(self._spawn(), self._submit(old.exit))
+
+    def _set_draining(self, draining: bool) -> None:
+        """Start or stop watching PTY for process output"""
+        if draining == self._pty_draining:
+            return
+        if draining:
+            self._loop.add_reader(self._pty_master, self._drain_pty)
+        else:
+            self._loop.remove_reader(self._pty_master)
+        self._pty_draining = draining
+
+    def _drain_pty(self) -> None:
+        """Move process output from PTY to buffer, called when PTY is readable"""
+        try:
+            data = os.read(self._pty_master, PTY_READ_SIZE)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b''
+        if not data:
+            self._set_draining(False)
+            return
+        self._pty_buf += data
+        self._pty_readable.set()
+        if len(self._pty_buf) >= PTY_BUFFER_LIMIT:
+            self._set_draining(False)
+
+    def _set_writing(self, writing: bool) -> None:
+        """Start or stop waiting for PTY to accept pending input"""
+        if writing == self._pty_writing:
+            return
+        if writing:
+            self._loop.add_writer(self._pty_master, self._flush_pty)
+        else:
+            self._loop.remove_writer(self._pty_master)
+        self._pty_writing = writing
+
+    def _flush_pty(self) -> None:
+        """Write pending input to PTY until it is full, called when PTY is writable"""
+        self._pty_timer = None
+        pending = self._pty_pending
+        wrote = False
+        while pending:
+            data, ctrl = pending[0]
+            if ctrl:
+                # a ctrl char discards unread input like on a terminal, only
+                # send it after the process took everything sent before it
+                if wrote or _unread_input(self._pty_slave):
+                    self._wait_pty(self._flush_pty)
+                    return
+                self._send_ctrl(data)
+                return
+            try:
+                written = os.write(self._pty_master, data)
+            except BlockingIOError:
+                written = 0
+            except OSError as e:
+                logger.warning('Dropped %d pending inputs to process: %s', len(pending), e)
+                pending.clear()
+                break
+            wrote = True
+            if written < len(data):
+                pending[0] = (_own_buffer(data[written:]), ctrl)
+                break
+            pending.popleft()
+        self._set_writing(bool(pending))
+
+    def _send_ctrl(self, ctrl: memoryview) -> None:
+        """Write pending ctrl char with original attrs, so it can be translated
+        to signal. Raw mode is restored a moment later, then later input follows."""
+        self._pty_pending.popleft()
+        termios.tcsetattr(self._pty_slave, termios.TCSANOW, self._pty_attrs)
+        try:
+            os.write(self._pty_master, ctrl)
+        except OSError as e:
+            logger.warning('Failed to send %r to process: %s', bytes(ctrl), e)
+        # line discipline handles input asynchronously
+        self._wait_pty(self._restore_raw)
+
+    def _restore_raw(self) -> None:
+        termios.tcsetattr(self._pty_slave, termios.TCSANOW, self._pty_raw_attrs)
+        self._flush_pty()
+
+    def _wait_pty(self, callback: Callable[[], None]) -> None:
+        """Pause writing pending input, run callback after PTY_CTRL_WAIT"""
+        self._set_writing(False)
+        self._pty_timer = self._loop.call_later(PTY_CTRL_WAIT, callback)
+
+    def process_and_update(self, resps: list[GdbResponse]) -> tuple[bool, GdbState | None]:
+        """Process responses in place like `process_responses`, and apply the
+        gdb state change found in the same pass.
+
+        Returns:
+            If seen 'result: done' in response, and new GdbState or None
+            if state not changed
+        """
+        done, new_state = process_responses(resps)
+        if new_state:
+            self.state = new_state
+            logger.debug('New state: %s', new_state)
+        return done, new_state
 
     async def get_responses(self, timeout: float = 1) -> list[GdbResponse]:
-        """Try to fetch GDB responses from GDB.
+        """Try to fetch GDB responses from GDB. Once any message arrives,
+        messages following it within `batch_window` are returned together.
 
         Args:
             timeout: seconds to wait for messages
         Returns:
             [] if no message, or list of responses. Raw responses.
         """
-        loop = asyncio.get_event_loop()
-        messages = await loop.run_in_executor(
-            self._executor,
-            lambda: self._controller.get_gdb_response(timeout, False),
+        controller = self._controller # bind now, restart may replace it
+        messages = await self._submit(
+            lambda: controller.get_gdb_response(timeout, False),
         )
         return [
             GdbResponse(r['type'], r['message'], r['payload']) for r in messages
@@ -155,13 +404,14 @@ class AsyncGdbController:
 
     async def execute(
         self,
-        command: str,
+        command: str | list[str],
         timeout: float | None = None,
     ) -> list[GdbResponse] | None:
         """Execute GDB/MI command asynchronously.
 
         Args:
-            command: GDB/MI command to execute
+            command: GDB/MI command to execute, or a list of commands which
+                are written to gdb at once and share one response batch
             timeout: Command timeout in seconds (None for default)
 
         Returns:
@@ -169,27 +419,27 @@ class AsyncGdbController:
         Raises:
             RuntimeError: If controller not started
         """
-        loop = asyncio.get_event_loop()
         parsed_responses = []
         if self.state is GdbState.RUNNING:
-            # perhaps user trigger interupt to stop tracee?
-            parsed_responses = await self.get_responses()
+            # perhaps user trigger interupt to stop tracee? only drain what
+            # is already available, don't block the command for a second
+            parsed_responses = await self.get_responses(0)
             if new_state := update_gdb_state(parsed_responses):
                 self.state = new_state
-                logger.debug(f'New state: {self.state}')
+                logger.debug('New state: %s', self.state)
 
         if self.state is not GdbState.STOPPED:
             return None
 
         timeout_sec = timeout if timeout is not None else self.timeout
 
-        logger.debug(f"Executing GDB command: {command}")
+        logger.debug("Executing GDB command: %s", command)
 
-        # Execute in thread pool and parse responses inline
+        # Execute in worker thread and parse responses inline
+        controller = self._controller # bind now, restart may replace it
         try:
-            responses = await loop.run_in_executor(
-                self._executor,
-                lambda: self._controller.write(command, timeout_sec, raise_error_on_timeout=False),
+            responses = await self._submit(
+                lambda: controller.write(command, timeout_sec, raise_error_on_timeout=False),
             )
         except BrokenPipeError:
             # gdb exited! restart it next time
@@ -200,15 +450,12 @@ class AsyncGdbController:
             GdbResponse(r['type'], r['message'], r['payload']) for r in responses
         )
 
-        done = process_responses(parsed_responses)
+        done, _ = self.process_and_update(parsed_responses)
 
-        if new_state := update_gdb_state(parsed_responses):
-            self.state = new_state
-            logger.debug(f'New state: {self.state}')
-
-        for r in parsed_responses:
-            logger.info(f'MSG: {r.mitype:9s} {r.message!r}')
-        logger.info(f'If we see done? {done}')
+        if logger.isEnabledFor(logging.INFO):
+            for r in parsed_responses:
+                logger.info('MSG: %-9s %r', r.mitype, r.message)
+            logger.info('If we see done? %s', done)
 
         if command == 'quit' or command == 'q':
             # identify quit to handle it
@@ -216,94 +463,97 @@ class AsyncGdbController:
         return parsed_responses
 
 
-    async def send_to_process(self, data: bytes) -> None:
-        """Send data to the target process through PTY.
+    async def send_to_process(self, data: bytes | bytearray | memoryview) -> None:
+        """Send data to the target process through PTY. Whatever the process
+        does not take at once is buffered and written when it reads more, so
+        this never waits for the process.
 
         Args:
-            data: String to send to the process
+            data: Encoded bytes or any bytes-like buffer to send to the process,
+                written without copying
         """
         if not self._pty_master:
             raise RuntimeError("PTY not available")
 
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(
-            None,
-            lambda: os.write(self._pty_master, data)
-        )
-        logger.debug(f"Sent to process: {data}")
+        view = memoryview(data)
+        if self._pty_pending or self._pty_timer: # can't be written now
+            view = _own_buffer(view)
+        self._pty_pending.append((view, False))
+        if self._pty_timer is None:
+            self._flush_pty()
+        logger.debug("Sent to process: %r", data)
 
     async def interrupt_process(self, ctrl: bytes) -> None:
-        """Interrupt target process by sending \\x03 to pty
+        """Interrupt target process by sending ctrl char like \\x03 to pty.
+        It is sent once the process read all input sent before it.
         """
         if not self._pty_master:
             raise RuntimeError("PTY not available")
 
-        def _send_ctrl():
-            try:
-                termios.tcsetattr(self._pty_slave, termios.TCSANOW, self._pty_attrs)
-                logger.info(f'Sent {ctrl} to slave')
-                os.write(self._pty_master, ctrl)
-            finally:
-                tty.setraw(self._pty_slave)
-
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, _send_ctrl)
-        logger.debug('Interrupting process')
+        # after pending input, same as typing it on a terminal
+        self._pty_pending.append((memoryview(ctrl), True))
+        if self._pty_timer is None:
+            self._flush_pty()
+        logger.info('Queued %r to slave', ctrl)
 
-    async def read_from_process(self, size: int = 4096, timeout: int = 5) -> str | None:
-        """Read data from the target process through PTY using poll.
+    async def read_from_process(self, size: int = 4096, timeout: float = 5) -> bytes | None:
+        """Read data from the target process. Output is drained from PTY in
+        background, so this only waits if nothing is buffered yet.
 
         Args:
             size: Maximum bytes to read
             timeout: Read timeout in secconds
 
         Returns:
-            Data read from process, or empty string on timeout/no data
+            Raw data read from process, or None on timeout/no data
         """
-        loop = asyncio.get_event_loop()
-
-        def _read():
+        # buffered output (any amount) is returned at once, and timeout <= 0
+        # is a plain poll, neither needs a timer armed by wait_for
+        if not self._pty_buf and timeout > 0:
+            self._pty_readable.clear()
             try:
-                return os.read(self._pty_master, size) if self.poller.poll(timeout * 1000) else b''
-            except OSError:
-                return b''
-
-        data = await loop.run_in_executor(None, _read)
+                await asyncio.wait_for(self._pty_readable.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        data = bytes(self._pty_buf[:size])
+        del self._pty_buf[:size]
+        if self._pty_master and len(self._pty_buf) < PTY_BUFFER_LIMIT:
+            self._set_draining(True)
         if not data:
             logger.debug('Process has no output currently')
             return None
-        if all(b >= 32 or b == 0xd or b == 0xa or b == 0x1b for b in data):
-            try:
-                result = data.decode('utf-8')
-                result = result.replace('\x1b', '^[')
-            except UnicodeDecodeError as _:
-                result = hexdump(data, 'return')
-        else:
-            result = hexdump(data, 'return')
-        logger.debug(f"Read from process: {result!r}")
-        return result
+        logger.debug("Read from process: %r", data)
+        return data
+
+    def _close_pty(self) -> None:
+        if self._pty_master:
+            self._set_draining(False)
+            self._set_writing(False)
+            self._pty_pending.clear()
+            if self._pty_timer:
+                self._pty_timer.cancel()
+                self._pty_timer = None
+            os.close(self._pty_master)
+            self._pty_master = None
+        if self._pty_slave:
+            os.close(self._pty_slave)
+            self._pty_slave = None
 
     async def close(self) -> None:
         if not self._started:
             return
         try:
             if self._controller:
-                loop = asyncio.get_event_loop()
-                await loop.run_in_executor(
-                    self._executor,
-                    self._controller.exit,
-                )
+                await self._submit(self._controller.exit)
                 self._controller = None
                 self._started = False
                 logger.info("GDB controller closed")
         finally:
-            # Close PTY
-            if self._pty_master:
-                os.close(self._pty_master)
-                self._pty_master = None
-            if self._pty_slave:
-                os.close(self._pty_slave)
-                self._pty_slave = None
-
-        self._executor.shutdown(wait=True)
+            self._close_pty()
+
+        # jobs submitted from now on are refused instead of never run
+        worker, self._worker = self._worker, None
+        self._jobs.put(None)
+        # don't block event loop while worker finishes its current job
+        await asyncio.to_thread(worker.join)
         self.state = GdbState.DEAD
@@ -1,10 +1,21 @@
 import argparse
+import asyncio
 from typing import cast
 from pwndbg_mcp import tools
 import sys
 
 DESC = 'An MCP tool endows AI agent with the capability to debug ELF'
 
+def positive_float(value: str) -> float:
+    """argparse type for seconds which must be greater than 0"""
+    try:
+        result = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'invalid float value: {value!r}') from None
+    if not result > 0: # also rejects nan
+        raise argparse.ArgumentTypeError(f'must be greater than 0: {value!r}')
+    return result
+
 def main():
     parser = argparse.ArgumentParser(description=f'pwndbg-mcp: {DESC}')
     parser.add_argument('--transport', '-t', choices=['stdio', 'http', 'sse'], default='http',
@@ -21,14 +32,18 @@ def main():
         help='Decomp2dbg connection host')
     parser.add_argument('--d2dport', '-P', type=int, metavar='PORT',
         help='Decomp2dbg connection port')
+    parser.add_argument('--batch-window', type=positive_float, default=tools.batch_window,
+        metavar='SEC', help='Seconds GDB output must stay quiet before it is returned as one '
+             f'batch, must be greater than 0 (default: {tools.batch_window})')
     args = parser.parse_args()
     cast(str, args.transport)
     cast(str, args.d2dname)
     tools.gdb_path = args.pwndbg
+    tools.batch_window = args.batch_window
 
     if args.d2dname:
         try:
-            setup = tools.D2dSetup(args.d2dname, args.d2dhost, args.d2dport)
+            setup = asyncio.run(tools.D2dSetup.create(args.d2dname, args.d2dhost, args.d2dport))
         except RuntimeError as e:
             print(e.args[0])
             sys.exit(1)
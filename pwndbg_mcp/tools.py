@@ -1,12 +1,18 @@
-from pwndbg_mcp.gdb_controller import AsyncGdbController, GdbState, update_gdb_state, process_responses
-from pwndbg_mcp.toon_formatter import format_response, format_simple
+from pwndbg_mcp.gdb_controller import AsyncGdbController, GdbState
+from pwndbg_mcp.toon_formatter import format_response, format_simple, format_process_output
 from pwn import *
+from pwnlib.context import context as pwn_context # `context` is taken by a tool
+import asyncio
 import logging
+import os
+import shlex
 import socket
-from concurrent import futures
+import sys
 from dataclasses import dataclass
+from typing import Any, Final
 
 from fastmcp import FastMCP
+from pygdbmi.constants import DEFAULT_TIME_TO_CHECK_FOR_ADDITIONAL_OUTPUT_SEC
 
 mcp = FastMCP('pwndbg-mcp')
 
@@ -20,23 +26,30 @@ class D2dSetup:
         if not d2dname.isalnum():
             raise RuntimeError('decomp2dbg section name only accept alphanumeric names')
         self.name = d2dname
-        if d2dhost:
-            with futures.ThreadPoolExecutor(max_workers=1) as executor:
-                future = executor.submit(socket.getaddrinfo, d2dhost, None)
-                try:
-                    future.result(timeout=3)
-                except futures.TimeoutError:
-                    raise RuntimeError('Resolve d2dhost timeout, perhaps use a ip address') from None
-                except socket.gaierror as e:
-                    raise RuntimeError('Can not resolve d2dhost') from e
-        elif not d2dhost:
-            d2dhost = None
-        self.host = d2dhost
+        self.host = d2dhost or None
 
         if d2dport and (d2dport < 1 or d2dport > 65535):
             raise RuntimeError(f'Invalid decomp2dbg port {d2dport}')
         self.port = d2dport
 
+    @classmethod
+    async def create(cls, d2dname: str, d2dhost: str | None, d2dport: int | None) -> 'D2dSetup':
+        """Validate decomp2dbg setup and check d2dhost can be resolved.
+
+        Raises:
+            RuntimeError: If setup is invalid or d2dhost can not be resolved
+        """
+        setup = cls(d2dname, d2dhost, d2dport)
+        if setup.host:
+            loop = asyncio.get_running_loop()
+            try:
+                await asyncio.wait_for(loop.getaddrinfo(setup.host, None, type=socket.SOCK_STREAM), 3)
+            except asyncio.TimeoutError:
+                raise RuntimeError('Resolve d2dhost timeout, perhaps use a ip address') from None
+            except socket.gaierror as e:
+                raise RuntimeError('Can not resolve d2dhost') from e
+        return setup
+
     def __str__(self) -> str:
         if self.host:
             return f'{self.name} --host {self.host} --port {self.port}'
@@ -46,29 +59,42 @@ class D2dSetup:
 
 d2d_setup: D2dSetup | None = None
 
-# Configure logging
+# Configure logging, level can be set by env PWNDBG_MCP_LOG
+_log_level = (os.getenv('PWNDBG_MCP_LOG') or 'WARNING').upper()
+# unknown names give 'Level XXX' instead of a number
+_valid_log_level = isinstance(logging.getLevelName(_log_level), int)
 logging.basicConfig(
-    level=logging.INFO,
+    level=_log_level if _valid_log_level else logging.WARNING,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
+if not _valid_log_level:
+    logger.warning('Unknown PWNDBG_MCP_LOG level %r, fall back to WARNING', _log_level)
 
 _gdb_controller: AsyncGdbController | None = None
+# concurrent tool calls must not launch gdb twice
+_gdb_lock = asyncio.Lock()
 gdb_path: str = None
+# see AsyncGdbController.batch_window
+batch_window: float = DEFAULT_TIME_TO_CHECK_FOR_ADDITIONAL_OUTPUT_SEC
 
 
-async def may_start_gdb() -> AsyncGdbController:
+async def may_start_gdb(force_restart: bool = False) -> AsyncGdbController:
     global _gdb_controller
-    # start if need or restart if dead
-    if _gdb_controller is None:
-        _gdb_controller = AsyncGdbController(gdb_path)
-        await _gdb_controller.start()
-    if _gdb_controller.state is GdbState.DEAD:
-        await _gdb_controller.close()
-        _gdb_controller = AsyncGdbController(gdb_path)
-        await _gdb_controller.start()
-    return _gdb_controller
+    async with _gdb_lock:
+        # start if need or restart if dead or asked to
+        if _gdb_controller is None:
+            _gdb_controller = AsyncGdbController(gdb_path, batch_window=batch_window)
+            await _gdb_controller.start()
+        elif force_restart or _gdb_controller.state is GdbState.DEAD:
+            await _gdb_controller.restart()
+        return _gdb_controller
+
 
+def mi_quote(arg: str) -> str:
+    """Quote arg as GDB/MI c-string"""
+    escaped = arg.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return f'"{escaped}"'
 
 # GDB controller part
 @mcp.tool(output_schema=None)
@@ -83,15 +109,14 @@ async def load_executable(executable_path: str, args: list[str] | None = None) -
         TOON-formatted GDB responses
     """
     gdb = await may_start_gdb()
-    logging.info(f'{gdb}')
-
-    # Load executable
-    responses = await gdb.execute(f'-file-exec-and-symbols "{executable_path}"')
+    logger.info('%s', gdb)
 
-    # Set arguments if provided
+    # Load executable, and set arguments if provided in the same round trip
+    commands = [f'-file-exec-and-symbols {mi_quote(executable_path)}']
     if args:
-        args_str = " ".join(args)
-        await gdb.execute(f'-exec-arguments {args_str}')
+        # passed to `set args`, which is split by shell when tracee starts
+        commands.append(f'-exec-arguments {shlex.join(args)}')
+    responses = await gdb.execute(commands)
 
     return format_response(responses, f"load {executable_path}")
 
@@ -108,12 +133,16 @@ async def execute_command(command: str) -> str:
     gdb = await may_start_gdb()
     responses = await gdb.execute(command)
     return format_response(responses, command)
+# not decorated, other tools call this function directly
+mcp.tool(execute_command, output_schema=None)
 
-AVAILABLE_ACTIONS = [
+AVAILABLE_ACTIONS: Final[frozenset[str]] = frozenset({
     'c', 'n', 'r', 's', 'kill', 'fin', 'ni', 'si', 'entry', 'start',
     'sstart', 'nextcall', 'nextjmp', 'nextret', 'nextsyscall', 'nextproginstr',
     'stepover', 'stepret', 'strpsyscall', 'stepuntilasm', 'xuntil',
-]
+})
+_ERR_UNKNOWN_ACTION: Final[str] = format_simple(
+    {'error': 'Unknown state action. Take a look at documentation'})
 @mcp.tool(output_schema=None)
 async def debug_control(action: str) -> str:
     """Control tracee running state by step, next or finish, etc. Use this prior
@@ -128,7 +157,7 @@ async def debug_control(action: str) -> str:
     """
     if action in AVAILABLE_ACTIONS:
         return await execute_command(action)
-    return format_simple({'error': 'Unknown state action. Take a look at documentation'})
+    return _ERR_UNKNOWN_ACTION
 
 async def connect_decomp2dbg() -> str:
     """Try to connect to decomp2dbg bridge with setup provided in cli. Requires
@@ -152,12 +181,19 @@ async def send_to_process(data: str) -> str:
         how many bytes sent if successfully sent
     """
     gdb = await may_start_gdb()
-    if all(ord(ch) < 0x100 for ch in data):
+    try: # send raw bytes if every char fits in one byte
         tosend = data.encode('latin1')
-    else:
+    except UnicodeEncodeError:
         tosend = data.encode()
     await gdb.send_to_process(tosend)
-    return format_simple(f"Sent {len(data)} bytes to process")
+    # plain sentence is already valid TOON, no need to encode
+    return f"Sent {len(tosend)} bytes to process"
+
+def _eval_statement(statement: str, ctx: dict) -> Any:
+    """eval `statement` with pwntools context settings `ctx`, which is
+    thread local, so it can run in worker thread"""
+    with pwn_context.local(**ctx):
+        return eval(statement, globals())
 
 @mcp.tool(output_schema=None)
 async def eval_to_send_to_process(statement: str) -> str:
@@ -174,22 +210,27 @@ async def eval_to_send_to_process(statement: str) -> str:
     """
     gdb = await may_start_gdb()
     try:
-        result = eval(statement)
+        # don't block event loop on heavy statements
+        result = await asyncio.to_thread(_eval_statement, statement, pwn_context.copy())
     except Exception as e:
         return format_simple({'status': 'error',
             'detail': f'Can not eval statement, raised {e}'})
-    try:
-        bytes_result = bytes(result)
-    except Exception as e:
-        return format_simple({'status': 'error',
-            'detail': f"Can not convert eval'ed result to bytes, raised {e}"})
+    if isinstance(result, (bytes, bytearray)):
+        # already a buffer, e.g. flat() result, send it as is
+        bytes_result = result
+    else:
+        try:
+            bytes_result = bytes(result)
+        except Exception as e:
+            return format_simple({'status': 'error',
+                'detail': f"Can not convert eval'ed result to bytes, raised {e}"})
 
     await gdb.send_to_process(bytes_result)
     return format_simple({'status': 'success',
             'detail': str(result)})
 
 @mcp.tool(output_schema=None)
-async def read_from_process(size: int = 1024, timeout: int = 5) -> str:
+async def read_from_process(size: int = 1024, timeout: float = 5) -> str:
     """Read data from the target process through PTY.
 
     Args:
@@ -203,13 +244,15 @@ async def read_from_process(size: int = 1024, timeout: int = 5) -> str:
     """
     gdb = await may_start_gdb()
     data = await gdb.read_from_process(size, timeout)
-    return format_simple(data)
+    return format_process_output(data)
 
-CTRL_MAP = {
+CTRL_MAP: Final[dict[str, tuple[bytes, str]]] = {
     'C-c': (b'\x03', 'SIGINT'),
     'C-d': (b'\x04', 'EOF'),
     'C-z': (b'\x1a', 'SIGTSTP'),
 }
+DEFAULT_CTRL: Final[tuple[bytes, str]] = CTRL_MAP['C-c']
+_ERR_NO_CTRL: Final[str] = format_simple({'error': 'No such ctrl char'})
 @mcp.tool(output_schema=None)
 async def interrupt_process(ctrl: str | None = None) -> str:
     """Interrupt target process through PTY. Equivalent to press Ctrl-C, Ctrl-Z or Ctrl-D
@@ -218,12 +261,12 @@ async def interrupt_process(ctrl: str | None = None) -> str:
         ctrl: Default is "Ctrl-C". Any of "C-c", "C-z" or "C-d"
     """
     gdb = await may_start_gdb()
-    tosend = CTRL_MAP.get(ctrl if ctrl is not None else 'C-c', None)
-    if tosend:
-        await gdb.interrupt_process(tosend[0])
-        return format_simple(f'Interrupt request {tosend[1]} sent')
+    tosend = CTRL_MAP.get(ctrl) if ctrl is not None else DEFAULT_CTRL
+    if tosend is None:
+        return _ERR_NO_CTRL
 
-    return format_simple({'error': 'No such ctrl char'})
+    await gdb.interrupt_process(tosend[0])
+    return f'Interrupt request {tosend[1]} sent' # valid TOON as is
 
 @mcp.tool(output_schema=None)
 async def pwndbg_status() -> str:
@@ -240,9 +283,7 @@ async def pwndbg_status() -> str:
     resps = await gdb.get_responses()
     if not resps:
         return format_simple({"gdb": gdb.state})
-    if new_state := update_gdb_state(resps):
-        gdb.state = new_state
-    process_responses(resps)
+    _, new_state = gdb.process_and_update(resps)
     return format_response(resps, f'gdb now has state {new_state}')
 
 
@@ -254,25 +295,55 @@ async def pwndbg_hard_reset() -> str:
     Returns:
         New gdb message
     """
-    gdb = await may_start_gdb()
-    await gdb.close()
-    await may_start_gdb()
-    return format_simple('success')
+    # restart under the lock, so tool calls during reset don't restart again
+    await may_start_gdb(force_restart=True)
+    return 'success'
 
 ###########################################################
 # some aliases
 ###########################################################
-@mcp.tool(output_schema=None)
-async def list_pwndbg_commands() -> str:
-    """If you don't know all pwndbg commands, run this tool first to
+def _alias_tool(name: str) -> None:
+    """Register tool `name` which simply runs a fixed pwndbg command from ALIASES"""
+    command, doc = ALIASES[name]
+    async def alias() -> str:
+        return await execute_command(command)
+    alias.__name__ = alias.__qualname__ = name
+    alias.__doc__ = doc
+    mcp.tool(alias, output_schema=None)
+
+# tool name: (pwndbg command, tool description)
+ALIASES: Final[dict[str, tuple[str, str]]] = {
+    'list_pwndbg_commands': ('pwndbg --all', """If you don't know all pwndbg commands, run this tool first to
     explore pwndbg commands usages. If you find any interesting command not
     in tool list, or you want to set more args, please invoke the command
     by `execute_command` directly.
 
     Return:
         pwndbg commands list or null if pwndbg waiting
-    """
-    return await execute_command("pwndbg --all")
+    """),
+    'heap': ('heap', """Examine heap with pwndbg
+
+    Returns:
+        overall heap status or null if pwndbg waiting
+    """),
+    'bins': ('bins', """Examine available chunks with pwndbg command bins
+
+    Returns:
+        overall bins status or null if pwndbg waiting
+    """),
+    'backtrace': ('backtrace', """Display program function backtrace
+
+    Returns:
+        gdb backtrace view or null if pwndbg waiting
+    """),
+    'procinfo': ('procinfo', """Display current process infomation
+
+    Returns:
+        process info including pid, opened fd, etc or null if pwndbg waiting
+    """),
+}
+# registered in place, tools are listed in registration order
+_alias_tool('list_pwndbg_commands')
 
 @mcp.tool(output_schema=None)
 async def telescope(statement: str, count: int = 10) -> str:
@@ -304,41 +375,10 @@ async def context(subsection: str | None = None) -> str:
         return await execute_command("context")
     return await execute_command(f"context {subsection}")
 
-@mcp.tool(output_schema=None)
-async def heap() -> str:
-    """Examine heap with pwndbg
-
-    Returns:
-        overall heap status or null if pwndbg waiting
-    """
-    return await execute_command("heap")
-
-@mcp.tool(output_schema=None)
-async def bins() -> str:
-    """Examine available chunks with pwndbg command bins
-
-    Returns:
-        overall bins status or null if pwndbg waiting
-    """
-    return await execute_command("bins")
-
-@mcp.tool(output_schema=None)
-async def backtrace() -> str:
-    """Display program function backtrace
-
-    Returns:
-        gdb backtrace view or null if pwndbg waiting
-    """
-    return await execute_command("backtrace")
-
-@mcp.tool(output_schema=None)
-async def procinfo() -> str:
-    """Display current process infomation
-
-    Returns:
-        process info including pid, opened fd, etc or null if pwndbg waiting
-    """
-    return await execute_command("procinfo")
+_alias_tool('heap')
+_alias_tool('bins')
+_alias_tool('backtrace')
+_alias_tool('procinfo')
 
 @mcp.tool(output_schema=None)
 async def vmmap(pattern: str | None = None) -> str:
@@ -365,9 +405,14 @@ async def xinfo(statement: str) -> str:
     return await execute_command(f'xinfo {statement}')
 
 def launch_mcp(mode: str, host: str | None = None, port: int | None = None):
-    mcp.tool(execute_command, output_schema=None)
     if d2d_setup:
         mcp.tool(connect_decomp2dbg, output_schema=None)
+    if sys.platform != 'win32':
+        try: # optional, faster event loop
+            import uvloop
+            uvloop.install()
+        except ImportError:
+            pass
     if mode == 'stdio':
         mcp.run(mode)
     else:
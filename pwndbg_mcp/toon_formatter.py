@@ -1,6 +1,13 @@
 from toon import encode
 from pwndbg_mcp.gdb_controller import GdbResponse
 from typing import Any
+from functools import lru_cache
+import binascii
+
+# bytes considered printable in process output, deleted by bytes.translate
+_PRINTABLE_BYTES = bytes(range(32, 256)) + b'\r\n\x1b'
+# map unprintable bytes to '.' in hexdump ascii column
+_HEXDUMP_ASCII = bytes(b if 0x20 <= b <= 0x7e else ord('.') for b in range(256))
 
 
 def format_response(responses: list[GdbResponse], command: str = "") -> str:
@@ -26,6 +33,10 @@ def format_response(responses: list[GdbResponse], command: str = "") -> str:
 
     return encode(result)
 
+@lru_cache(maxsize=256)
+def _encode_item(key: str, value: str) -> str:
+    return encode({key: value})
+
 def format_simple(text: Any) -> str:
     """Format simple text output as TOON.
 
@@ -35,4 +46,47 @@ def format_simple(text: Any) -> str:
     Returns:
         TOON-formatted string
     """
+    if isinstance(text, dict) and len(text) == 1:
+        # status and error replies, only a handful of distinct values.
+        # cache str only, lru_cache takes 1, 1.0 and True as the same key
+        (key, value), = text.items()
+        if isinstance(key, str) and isinstance(value, str):
+            return _encode_item(key, value)
     return encode(text)
+
+def hexdump(data: bytes) -> str:
+    """Dump data in the same layout as `hexdump.hexdump(data, 'return')`,
+    with hex encoding done by binascii.
+
+    Args:
+        data: Bytes to dump
+
+    Returns:
+        Lines of 16 bytes each, like `00000000: 41 41 ...  AA..`
+    """
+    lines = []
+    for addr in range(0, len(data), 16):
+        chunk = data[addr:addr + 16]
+        hexstr = binascii.hexlify(chunk, ' ').upper().decode()
+        text = chunk.translate(_HEXDUMP_ASCII).decode()
+        lines.append('%08X: %-24s %-23s  %s' % (addr, hexstr[:24], hexstr[24:], text))
+    return '\n'.join(lines)
+
+def format_process_output(data: bytes | None) -> str:
+    """Format data read from process as TOON.
+
+    Args:
+        data: Raw bytes read from process, or None if nothing read
+
+    Returns:
+        TOON-formatted string of decoded text if all bytes are printable,
+        or hexdump of data if not
+    """
+    if data is None:
+        return format_simple(data)
+    if not data.translate(None, _PRINTABLE_BYTES):
+        try:
+            return format_simple(data.decode('utf-8').replace('\x1b', '^['))
+        except UnicodeDecodeError:
+            pass
+    return format_simple(hexdump(data))
@@ -0,0 +1,42 @@
+import os
+from pathlib import Path
+from typing import Callable
+
+import pytest
+import pytest_asyncio
+
+from pwndbg_mcp.gdb_controller import AsyncGdbController
+
+STUB_GDB = str(Path(__file__).with_name('stub_gdb.py'))
+
+
+@pytest.fixture
+def stub_gdb() -> str:
+    """Path of the stub gdb script, usable as gdb binary"""
+    return STUB_GDB
+
+
+@pytest.fixture
+def stub_processes() -> Callable[[], int]:
+    """Return a function counting running stub gdb processes"""
+    def count() -> int:
+        result = 0
+        for pid in os.listdir('/proc'):
+            try:
+                with open(f'/proc/{pid}/cmdline', 'rb') as f:
+                    argv = f.read().split(b'\0')
+            except (OSError, ValueError):
+                continue
+            if STUB_GDB.encode() in argv:
+                result += 1
+        return result
+    return count
+
+
+@pytest_asyncio.fixture
+async def gdb():
+    """Started controller on stub gdb"""
+    controller = AsyncGdbController(STUB_GDB, batch_window=0.05)
+    await controller.start()
+    yield controller
+    await controller.close()
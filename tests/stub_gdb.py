@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+"""Minimal GDB/MI stand-in for tests: echo every command as console output
+and report it done. Command line args (e.g. `-ex 'set inferior-tty ...'`)
+are ignored, exits when stdin is closed."""
+import sys
+
+for line in sys.stdin:
+    command = line.strip().replace('\\', '').replace('"', '')
+    sys.stdout.write(f'~"{command}\\n"\n^done\n(gdb) \n')
+    sys.stdout.flush()
@@ -0,0 +1,161 @@
+import asyncio
+import fcntl
+import os
+import signal
+import subprocess
+import termios
+import time
+
+import pytest
+
+from pwndbg_mcp import gdb_controller
+from pwndbg_mcp.gdb_controller import AsyncGdbController, GdbMIType
+
+
+async def read_slave(gdb: AsyncGdbController, size: int, timeout: float = 5) -> bytes:
+    """Read `size` bytes as the process would, giving the loop time to write"""
+    os.set_blocking(gdb._pty_slave, False)
+    data = bytearray()
+    deadline = time.monotonic() + timeout
+    while len(data) < size and time.monotonic() < deadline:
+        try:
+            data += os.read(gdb._pty_slave, size - len(data))
+        except BlockingIOError:
+            await asyncio.sleep(0.01)
+    return bytes(data)
+
+
+@pytest.mark.asyncio
+async def test_execute(gdb):
+    resps = await gdb.execute('info')
+    assert [(r.mitype, r.message) for r in resps] == [(GdbMIType.CONSOLE, 'info')]
+
+
+@pytest.mark.asyncio
+async def test_read_timeout_and_poll(gdb):
+    start = time.monotonic()
+    assert await gdb.read_from_process(16, 0.2) is None
+    assert time.monotonic() - start >= 0.2
+
+    start = time.monotonic()
+    assert await gdb.read_from_process(16, 0) is None
+    assert time.monotonic() - start < 0.1
+
+    os.write(gdb._pty_slave, b'hello\n')
+    assert await gdb.read_from_process(4, 1) == b'hell'
+    # rest is already buffered, a poll gets it
+    assert await gdb.read_from_process(16, 0) == b'o\n'
+
+
+@pytest.mark.asyncio
+async def test_drain_stops_at_buffer_limit(gdb, monkeypatch):
+    monkeypatch.setattr(gdb_controller, 'PTY_BUFFER_LIMIT', 0x1000)
+    payload = bytes(range(256)) * 0x40 # 16 KiB, 4 times the limit
+    os.set_blocking(gdb._pty_slave, False)
+    sent = 0
+    deadline = time.monotonic() + 5
+    while gdb._pty_draining and time.monotonic() < deadline:
+        try:
+            sent += os.write(gdb._pty_slave, payload[sent:sent + 0x100])
+        except BlockingIOError:
+            pass
+        await asyncio.sleep(0.001)
+    # process output is no longer taken once buffer is full
+    assert not gdb._pty_draining
+    assert 0x1000 <= len(gdb._pty_buf) < len(payload)
+
+    received = bytearray()
+    while len(received) < len(payload) and time.monotonic() < deadline:
+        if sent < len(payload):
+            try:
+                sent += os.write(gdb._pty_slave, payload[sent:sent + 0x100])
+            except BlockingIOError:
+                pass
+        # reading resumes draining
+        received += await gdb.read_from_process(0x1000, 0.1) or b''
+    assert received == payload
+
+
+@pytest.mark.asyncio
+async def test_large_send_does_not_block_gdb(gdb):
+    payload = bytes(range(256)) * 0x100 # 64 KiB, more than the PTY takes
+    await asyncio.wait_for(gdb.send_to_process(payload), 1)
+    assert gdb._pty_pending and gdb._pty_writing
+    # process is not reading, gdb is still usable
+    assert await asyncio.wait_for(gdb.execute('c'), 5)
+
+    assert await read_slave(gdb, len(payload)) == payload
+    assert not gdb._pty_pending and not gdb._pty_writing
+
+
+@pytest.mark.asyncio
+async def test_reused_buffer_after_partial_write(gdb):
+    first = bytearray(b'A' * 0x10000)
+    second = bytearray(b'B' * 0x1000)
+    await gdb.send_to_process(first) # partially written
+    await gdb.send_to_process(second) # queued behind
+    first[:] = b'X' * len(first)
+    second[:] = b'Y' * len(second)
+
+    assert await read_slave(gdb, 0x11000) == b'A' * 0x10000 + b'B' * 0x1000
+
+
+@pytest.mark.asyncio
+async def test_ctrl_char_queued_behind_input(gdb):
+    payload = b'C' * 0x10000
+    await gdb.send_to_process(payload)
+    await gdb.interrupt_process(b'\x03')
+    await gdb.send_to_process(b'after')
+    assert [ctrl for _, ctrl in gdb._pty_pending] == [False, True, False]
+
+    # ctrl char waits until the process took all earlier input, so nothing
+    # is discarded, and input after it arrives once raw mode is back
+    assert await read_slave(gdb, len(payload)) == payload
+    assert await read_slave(gdb, 5) == b'after'
+    assert not gdb._pty_pending and gdb._pty_timer is None
+    assert termios.tcgetattr(gdb._pty_slave) == gdb._pty_raw_attrs
+
+
+@pytest.mark.asyncio
+async def test_ctrl_char_interrupts_process(gdb):
+    slave = gdb._pty_slave
+    proc = subprocess.Popen(['sleep', '10'], stdin=slave, stdout=slave, stderr=slave,
+        start_new_session=True, preexec_fn=lambda: fcntl.ioctl(0, termios.TIOCSCTTY, 0))
+    try:
+        await asyncio.sleep(0.1)
+        await gdb.interrupt_process(b'\x03')
+        for _ in range(100):
+            if proc.poll() is not None:
+                break
+            await asyncio.sleep(0.01)
+        assert proc.returncode == -signal.SIGINT
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+
+@pytest.mark.asyncio
+async def test_concurrent_restarts_share_one(gdb, stub_processes):
+    spawned = 0
+    spawn = gdb._spawn
+    async def counting_spawn():
+        nonlocal spawned
+        spawned += 1
+        await spawn()
+    gdb._spawn = counting_spawn
+
+    await asyncio.gather(gdb.restart(), gdb.restart(), gdb.restart())
+    assert spawned == 1
+    assert stub_processes() == 1
+    assert await gdb.execute('info')
+
+
+@pytest.mark.asyncio
+async def test_closed_controller_refuses_jobs(gdb):
+    await gdb.execute('quit')
+    with pytest.raises(RuntimeError, match='closed'):
+        await asyncio.wait_for(gdb.get_responses(0), 1)
+    # start again after quit
+    await gdb.restart()
+    assert await gdb.execute('info')
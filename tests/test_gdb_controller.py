@@ -0,0 +1,63 @@
+from pwndbg_mcp.gdb_controller import GdbMIType, GdbResponse, GdbState, process_responses
+
+
+def console(text: str) -> GdbResponse:
+    return GdbResponse('console', None, text)
+
+
+def messages(resps: list[GdbResponse]) -> list[tuple[GdbMIType, str]]:
+    return [(r.mitype, r.message) for r in resps]
+
+
+def test_console_fragments_joined():
+    resps = [console('0x1: '), console('\x1b[31mmov\x1b[0m '), console('rax, 1\n')]
+    assert process_responses(resps) == (False, None)
+    assert messages(resps) == [(GdbMIType.CONSOLE, '0x1: mov rax, 1')]
+
+
+def test_unterminated_tail_kept_in_place():
+    # last console line has no newline, it is kept as console output at the
+    # position of its last fragment, like lines which are terminated
+    resps = [
+        console('line\n'),
+        console('\x1b[32mpart'),
+        GdbResponse('notify', 'stopped', {'reason': 'breakpoint-hit'}),
+        console('ial'),
+        GdbResponse('result', 'done', None),
+    ]
+    assert process_responses(resps) == (True, GdbState.STOPPED)
+    assert messages(resps) == [
+        (GdbMIType.CONSOLE, 'line'),
+        (GdbMIType.NOTIFY, 'stopped'),
+        (GdbMIType.CONSOLE, 'partial'),
+    ]
+
+
+def test_results_dropped_except_errors():
+    resps = [
+        GdbResponse('notify', 'cmd-param-changed', {'param': 'args'}),
+        GdbResponse('result', 'done', None),
+        GdbResponse('result', 'error', {'msg': 'No symbol table is loaded.'}),
+    ]
+    assert process_responses(resps) == (True, None)
+    assert messages(resps) == [(GdbMIType.RESULT, 'error: No symbol table is loaded.')]
+
+
+def test_last_state_wins():
+    resps = [
+        GdbResponse('notify', 'running', {'thread-id': 'all'}),
+        GdbResponse('log', None, '\x1b[1mwarning\x1b[0m\n'),
+        GdbResponse('notify', 'stopped', {}),
+    ]
+    assert process_responses(resps) == (False, GdbState.STOPPED)
+    assert messages(resps) == [
+        (GdbMIType.NOTIFY, 'running'),
+        (GdbMIType.LOG, 'warning'),
+        (GdbMIType.NOTIFY, 'stopped'),
+    ]
+
+
+def test_error_reason_only_for_result_records():
+    assert GdbResponse('result', 'error', {'msg': 'bad'}).message == 'error: bad'
+    assert GdbResponse('result', 'error', 'bad').message == 'error'
+    assert GdbResponse('notify', 'error', {'msg': 'bad'}).message == 'error'
@@ -0,0 +1,29 @@
+import asyncio
+
+import pytest
+
+from pwndbg_mcp import tools
+
+
+@pytest.mark.asyncio
+async def test_concurrent_force_restart(monkeypatch, stub_gdb, stub_processes):
+    monkeypatch.setattr(tools, 'gdb_path', stub_gdb)
+    monkeypatch.setattr(tools, '_gdb_controller', None)
+    # fresh lock for this test's event loop
+    monkeypatch.setattr(tools, '_gdb_lock', asyncio.Lock())
+
+    gdb = await tools.may_start_gdb()
+    try:
+        results = await asyncio.gather(
+            tools.may_start_gdb(force_restart=True),
+            tools.execute_command('info'),
+            tools.pwndbg_hard_reset(),
+            tools.may_start_gdb(force_restart=True),
+        )
+        assert results[0] is gdb and results[3] is gdb
+        assert results[2] == 'success'
+        assert stub_processes() == 1
+        assert 'info' in await tools.execute_command('info')
+    finally:
+        await gdb.close()
+    assert stub_processes() == 0
@@ -0,0 +1,60 @@
+from pwndbg_mcp.toon_formatter import format_process_output, hexdump
+
+# rows as printed by `hexdump.hexdump(data, 'return')` from hexdump 3.3
+FULL_ROW = '00000000: 41 42 43 44 45 46 47 48  49 4A 4B 4C 4D 4E 4F 50  ABCDEFGHIJKLMNOP'
+
+
+def test_hexdump_empty():
+    assert hexdump(b'') == ''
+
+
+def test_hexdump_full_row():
+    assert hexdump(b'ABCDEFGHIJKLMNOP') == FULL_ROW
+
+
+def test_hexdump_short_row():
+    assert hexdump(b'\x00\x01AB\xff') == \
+        '00000000: 00 01 41 42 FF                                    ..AB.'
+
+
+def test_hexdump_short_row_across_gap():
+    assert hexdump(b'ABCDEFGHIJ') == \
+        '00000000: 41 42 43 44 45 46 47 48  49 4A                    ABCDEFGHIJ'
+
+
+def test_hexdump_partial_last_row():
+    assert hexdump(b'ABCDEFGHIJKLMNOPQRST') == FULL_ROW + '\n' \
+        '00000010: 51 52 53 54                                       QRST'
+
+
+def test_hexdump_addresses_and_ascii_column():
+    data = bytes(range(0x1e, 0x1e + 0x22))
+    assert hexdump(data) == '\n'.join([
+        '00000000: 1E 1F 20 21 22 23 24 25  26 27 28 29 2A 2B 2C 2D  .. !"#$%&\'()*+,-',
+        '00000010: 2E 2F 30 31 32 33 34 35  36 37 38 39 3A 3B 3C 3D  ./0123456789:;<=',
+        '00000020: 3E 3F                                             >?',
+    ])
+
+
+def test_hexdump_high_bytes():
+    assert hexdump(bytes(range(0x7c, 0x84))) == \
+        '00000000: 7C 7D 7E 7F 80 81 82 83                           |}~.....'
+
+
+def test_format_process_output_none():
+    assert format_process_output(None) == 'null'
+
+
+def test_format_process_output_text():
+    assert format_process_output(b'caf\xc3\xa9') == 'café'
+    assert format_process_output(b'hi\x1b[31m\r\n') == '"hi^[[31m\\r\\n"'
+
+
+def test_format_process_output_unprintable():
+    assert format_process_output(b'\x00\x01AB\xff') == \
+        '"00000000: 00 01 41 42 FF                                    ..AB."'
+
+
+def test_format_process_output_invalid_utf8():
+    assert format_process_output(b'\xff\xfe') == \
+        '"00000000: FF FE                                             .."'